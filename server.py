@@ -5,16 +5,25 @@ Hides API key from frontend.
 """
 
 import asyncio
+import email.message
+import hashlib
+import json
 import logging
 import os
 import struct
-from contextlib import asynccontextmanager
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager, suppress
 
 import httpx
-from fastapi import FastAPI, HTTPException
+import orjson
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response, StreamingResponse
-from pydantic import BaseModel, Field
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi.utils import is_body_allowed_for_status_code
+from pydantic import BaseModel, Field, ValidationError
+from starlette.exceptions import HTTPException as StarletteHTTPException
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -66,8 +75,277 @@ DEFAULT_VOICES = {
     ],
 }
 
+# Default voice per language (Giovanni for Italian, Rachel otherwise)
+DEFAULT_VOICE_BY_LANGUAGE = {"it": "zcAOhNBS3c14rBihAFp1"}
+DEFAULT_VOICE_ID = "21m00Tcm4TlvDq8ikWAM"
+
+# ElevenLabs API paths (relative to the client's base_url)
+_TTS_PATH = "/text-to-speech/"
+_STREAM_SUFFIX = "/stream"
+_STREAM_PARAMS = {"output_format": "pcm_24000"}
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
 # HTTP client
 http_client: httpx.AsyncClient | None = None
+KEEPALIVE_EXPIRY = 60.0
+
+# Audio cache: total size budget in bytes (0 disables caching)
+AUDIO_CACHE_MAX_BYTES = int(os.getenv("AUDIO_CACHE_MAX_BYTES", str(128 * 1024 * 1024)))
+# Audio cache: entry lifetime in seconds; hits in the last 10% trigger a background refresh
+AUDIO_CACHE_TTL = float(os.getenv("AUDIO_CACHE_TTL", "86400"))
+AUDIO_CACHE_REFRESH_FRACTION = 0.1
+# Audio cache: seconds to wait before retrying a failed background refresh of the same key
+AUDIO_CACHE_REFRESH_RETRY = 60.0
+
+
+# ── Audio Cache ───────────────────────────────────────────────────────────
+
+
+# key -> (audio, created_at)
+_audio_cache: OrderedDict[bytes, tuple[bytes, float]] = OrderedDict()
+_audio_cache_bytes = 0
+
+
+def _cache_key(
+    output_format: str, model_id: str, voice_id: str, stability: float, similarity_boost: float, text: str
+) -> bytes:
+    """Fixed-size digest of every parameter that affects the generated audio.
+
+    Hashing keeps lookups O(1) in the text length. voice_id is client-supplied, so
+    it is length-prefixed to keep "|" inside it from shifting the field boundaries.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{output_format}|{model_id}|{len(voice_id)}:{voice_id}|{stability!r}|{similarity_boost!r}|".encode())
+    h.update(text.encode())
+    return h.digest()
+
+
+def _cache_get(key: bytes) -> tuple[bytes | None, bool]:
+    """Return (audio, needs_refresh); expired entries are dropped and count as a miss."""
+    global _audio_cache_bytes
+    entry = _audio_cache.get(key)
+    if entry is None:
+        return None, False
+
+    audio, created_at = entry
+    age = time.monotonic() - created_at
+    if age >= AUDIO_CACHE_TTL:
+        del _audio_cache[key]
+        _audio_cache_bytes -= len(audio)
+        _refresh_retry_at.pop(key, None)
+        return None, False
+
+    _audio_cache.move_to_end(key)
+    return audio, age >= AUDIO_CACHE_TTL * (1 - AUDIO_CACHE_REFRESH_FRACTION)
+
+
+def _cache_put(key: bytes, audio: bytes) -> None:
+    """Store audio, evicting least recently used entries beyond the size budget."""
+    global _audio_cache_bytes
+    if not audio or len(audio) > AUDIO_CACHE_MAX_BYTES:
+        return
+
+    old = _audio_cache.pop(key, None)
+    if old is not None:
+        _audio_cache_bytes -= len(old[0])
+    _audio_cache[key] = (audio, time.monotonic())
+    _audio_cache_bytes += len(audio)
+
+    while _audio_cache_bytes > AUDIO_CACHE_MAX_BYTES:
+        evicted_key, (evicted, _) = _audio_cache.popitem(last=False)
+        _audio_cache_bytes -= len(evicted)
+        _refresh_retry_at.pop(evicted_key, None)
+
+
+class _SharedAudioFetch:
+    """One upstream /synthesize download that any number of clients stream from.
+
+    The download runs in its own task, so a client disconnecting does not abort it
+    for the other listeners; the complete body is cached when it finishes.
+
+    Chunks are retained for the whole download only while the body can still fit in
+    the cache. Otherwise (cache disabled or audio over budget) chunks every listener
+    has already consumed are dropped, so memory follows the slowest listener, and the
+    download is cancelled once no listener is left.
+    """
+
+    def __init__(self, key: bytes, voice_id: str, body: bytes):
+        self.chunks: list[bytes] = []
+        self.done = False
+        self.error: Exception | None = None
+        # Resolves once upstream answered with a success status (or fails with its error)
+        self.ready: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._changed = asyncio.Event()
+        self._base = 0  # absolute index of chunks[0]
+        self._size = 0
+        self._retain = AUDIO_CACHE_MAX_BYTES > 0
+        self._positions: dict[object, int] = {}  # listener -> absolute index of its next chunk
+        self._key = key
+        self.task = asyncio.create_task(self._run(key, voice_id, body))
+
+    @property
+    def joinable(self) -> bool:
+        """A new listener can join only while the stream is still complete from the start."""
+        return self._base == 0
+
+    async def _run(self, key: bytes, voice_id: str, body: bytes):
+        try:
+            async with http_client.stream(
+                "POST", _TTS_PATH + voice_id, headers=_JSON_HEADERS, content=body
+            ) as response:
+                if response.is_error:
+                    await response.aread()
+                    response.raise_for_status()
+                self.ready.set_result(None)
+
+                async for chunk in response.aiter_bytes():
+                    self.chunks.append(chunk)
+                    self._size += len(chunk)
+                    if self._retain and self._size > AUDIO_CACHE_MAX_BYTES:
+                        # Too large for the cache: keep only what listeners still need
+                        self._retain = False
+                        self._cancel_if_unused()
+                    self._trim()
+                    self._notify()
+
+            if self._retain:
+                _cache_put(key, b"".join(self.chunks))
+        except Exception as e:
+            self.error = e
+            if not self.ready.done():
+                self.ready.set_exception(e)
+            else:
+                logger.exception("Synthesis stream error")
+        finally:
+            if not self.ready.done():
+                # Cancelled before upstream answered
+                self.ready.cancel()
+            self.done = True
+            self._notify()
+            if _inflight.get(key) is self:
+                del _inflight[key]
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def _trim(self):
+        if self._retain:
+            return
+        keep_from = min(self._positions.values(), default=self._base + len(self.chunks))
+        del self.chunks[:keep_from - self._base]
+        self._base = keep_from
+
+    def add_listener(self) -> object:
+        """Register a listener from the first chunk; must be called while joinable."""
+        listener = object()
+        self._positions[listener] = 0
+        return listener
+
+    def remove_listener(self, listener: object):
+        self._positions.pop(listener, None)
+        self._trim()
+        self._cancel_if_unused()
+
+    def _cancel_if_unused(self):
+        """Stop downloading audio that nobody listens to and that cannot be cached."""
+        if self._retain or self._positions or self.done:
+            return
+        # Leave _inflight now so no request joins a download that is being cancelled
+        if _inflight.get(self._key) is self:
+            del _inflight[self._key]
+        self.task.cancel()
+
+    async def iter_chunks(self, listener: object):
+        """Yield everything received so far, then new chunks as they arrive.
+
+        Re-raises the upstream error, after the chunks received before it, if the
+        download failed midway.
+        """
+        try:
+            while True:
+                while self._positions[listener] < self._base + len(self.chunks):
+                    i = self._positions[listener]
+                    chunk = self.chunks[i - self._base]
+                    self._positions[listener] = i + 1
+                    self._trim()
+                    yield chunk
+                if self.done:
+                    if self.error is not None:
+                        # Abort the response instead of ending a truncated body cleanly
+                        raise self.error
+                    return
+                await self._changed.wait()
+        finally:
+            self.remove_listener(listener)
+
+
+# Upstream downloads in flight, shared by concurrent identical requests
+_inflight: dict[bytes, _SharedAudioFetch] = {}
+
+
+async def _shared_audio_fetch(key: bytes, voice_id: str, body: bytes):
+    """Single-flight: join the in-flight download for key, or start one.
+
+    Returns the listener's chunk iterator once upstream accepted the request;
+    raises httpx.HTTPStatusError otherwise.
+    """
+    fetch = _inflight.get(key)
+    if fetch is None or not fetch.joinable:
+        fetch = _inflight[key] = _SharedAudioFetch(key, voice_id, body)
+    listener = fetch.add_listener()
+    try:
+        await asyncio.shield(fetch.ready)
+    except BaseException:
+        fetch.remove_listener(listener)
+        raise
+    return fetch.iter_chunks(listener)
+
+
+# Keys whose last background refresh failed -> monotonic time before which it is not retried
+_refresh_retry_at: dict[bytes, float] = {}
+
+
+def _refresh_audio(key: bytes, voice_id: str, body: bytes) -> None:
+    """Re-download a cache entry in the background (its fetch re-caches it on completion).
+
+    A failed refresh is logged and backs off for AUDIO_CACHE_REFRESH_RETRY seconds, so a
+    rate-limited upstream is not hit again on every cache hit of a hot key.
+    """
+    if key in _inflight or time.monotonic() < _refresh_retry_at.get(key, 0.0):
+        return
+    fetch = _inflight[key] = _SharedAudioFetch(key, voice_id, body)
+
+    def on_done(_):
+        # Nobody awaits a background refresh: consume its outcome to avoid unretrieved-exception warnings
+        if fetch.ready.done() and not fetch.ready.cancelled():
+            fetch.ready.exception()
+        if fetch.error is None:
+            _refresh_retry_at.pop(key, None)
+        else:
+            logger.warning(f"Cache refresh failed: {fetch.error!r}")
+            _refresh_retry_at[key] = time.monotonic() + AUDIO_CACHE_REFRESH_RETRY
+
+    fetch.task.add_done_callback(on_done)
+
+
+# ── Connection Warmup ─────────────────────────────────────────────────────
+
+
+async def _warm_connection():
+    """Open (or refresh) a pooled TLS connection to ElevenLabs; errors are ignored."""
+    try:
+        # Short timeout: a slow upstream must not hold back startup (HEALTHCHECK start-period is 5s)
+        await http_client.get("/models", timeout=5.0)
+    except Exception as e:
+        logger.warning(f"Connection warmup failed: {e}")
+
+
+async def _keep_warm():
+    """Ping upstream just before keep-alive expiry so one connection stays open."""
+    while True:
+        await asyncio.sleep(KEEPALIVE_EXPIRY - 5.0)
+        await _warm_connection()
 
 
 # ── Lifespan ──────────────────────────────────────────────────────────────
@@ -84,22 +362,48 @@ async def lifespan(app: FastAPI):
     else:
         logger.info("ElevenLabs API key configured")
 
-    # Create HTTP client for API calls
-    http_client = httpx.AsyncClient(timeout=60.0)
+    # Create pooled HTTP client for API calls: keep-alive + HTTP/2 so that
+    # concurrent requests are multiplexed as streams over a few TLS connections
+    http_client = httpx.AsyncClient(
+        base_url=ELEVENLABS_BASE_URL,
+        headers={"xi-api-key": ELEVENLABS_API_KEY},
+        timeout=httpx.Timeout(connect=5.0, read=60.0, write=10.0, pool=5.0),
+        limits=httpx.Limits(max_keepalive_connections=32, max_connections=32, keepalive_expiry=KEEPALIVE_EXPIRY),
+        http2=True,
+    )
+
+    # Pay DNS + TCP + TLS at startup instead of on the first user request
+    keep_warm_task = None
+    if ELEVENLABS_API_KEY:
+        await _warm_connection()
+        keep_warm_task = asyncio.create_task(_keep_warm())
 
     logger.info("Server ready")
     yield
 
     logger.info("Shutting down...")
+    if keep_warm_task:
+        keep_warm_task.cancel()
+        # Let an in-flight ping unwind before the client is closed under it
+        with suppress(asyncio.CancelledError):
+            await keep_warm_task
     if http_client:
         await http_client.aclose()
 
 
+class OrjsonResponse(JSONResponse):
+    """JSONResponse rendered with orjson (FastAPI's own ORJSONResponse is deprecated)."""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
 app = FastAPI(
     title="ElevenLabs TTS Proxy API",
     description="Proxy for ElevenLabs API (Turbo v2.5 + Multilingual v3)",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=OrjsonResponse,
 )
 
 app.add_middleware(
@@ -111,6 +415,43 @@ app.add_middleware(
 )
 
 
+# ── Error Handlers ────────────────────────────────────────────────────────
+
+
+@app.exception_handler(StarletteHTTPException)
+async def http_exception_handler(request: Request, exc: StarletteHTTPException):
+    if not is_body_allowed_for_status_code(exc.status_code):
+        return Response(status_code=exc.status_code, headers=exc.headers)
+    return OrjsonResponse({"detail": exc.detail}, status_code=exc.status_code, headers=exc.headers)
+
+
+def _validation_json_default(obj):
+    # Like jsonable_encoder: raw bodies (bytes) are decoded, other values (e.g. exceptions in "ctx") use str()
+    if isinstance(obj, bytes):
+        return obj.decode(errors="replace")
+    return str(obj)
+
+
+@app.exception_handler(RequestValidationError)
+async def validation_exception_handler(request: Request, exc: RequestValidationError):
+    # Same body as FastAPI's default handler, serialized with orjson
+    return Response(
+        content=orjson.dumps({"detail": exc.errors()}, default=_validation_json_default),
+        status_code=422,
+        media_type="application/json",
+    )
+
+
+@app.exception_handler(httpx.HTTPStatusError)
+async def upstream_error_handler(request: Request, exc: httpx.HTTPStatusError):
+    """Pass ElevenLabs errors through unchanged (body is usually already JSON)."""
+    return Response(
+        content=exc.response.content,
+        status_code=exc.response.status_code,
+        media_type=exc.response.headers.get("content-type"),
+    )
+
+
 # ── Request / Response Models ─────────────────────────────────────────────
 
 
@@ -133,104 +474,235 @@ class VoiceInfo(BaseModel):
     file: str  # Using 'file' field for voice_id to match other backends
 
 
+# Static metadata responses, validated and serialized once at import time
+def _voices_json(voices: list[dict]) -> bytes:
+    return orjson.dumps([VoiceInfo(name=v["name"], file=v["id"]).model_dump() for v in voices])
+
+
+_LANGUAGES_JSON = orjson.dumps(
+    [LanguageInfo(code=code, name=name).model_dump() for code, name in SUPPORTED_LANGUAGES.items()]
+)
+_VOICES_JSON = {lang: _voices_json(voices) for lang, voices in DEFAULT_VOICES.items()}
+_ALL_VOICES_JSON = _voices_json([v for voices in DEFAULT_VOICES.values() for v in voices])
+
+
 # ── Endpoints ─────────────────────────────────────────────────────────────
 
 
 @app.get("/health")
 async def health_check():
-    return {
+    # Returned as a Response so FastAPI skips jsonable_encoder on the dict
+    return OrjsonResponse({
         "status": "ok",
         "model": "elevenlabs-proxy",
         "api_key_configured": bool(ELEVENLABS_API_KEY),
-    }
+    })
 
 
-@app.get("/languages", response_model=list[LanguageInfo])
+@app.get("/languages", responses={200: {"model": list[LanguageInfo]}})
 async def list_languages():
-    return [LanguageInfo(code=code, name=name) for code, name in SUPPORTED_LANGUAGES.items()]
+    return Response(content=_LANGUAGES_JSON, media_type="application/json")
 
 
-@app.get("/voices", response_model=list[VoiceInfo])
+@app.get("/voices", responses={200: {"model": list[VoiceInfo]}})
 async def list_voices(language: str | None = None):
     """List available ElevenLabs voices (subset of popular voices)."""
-    result = []
-
-    if language and language in DEFAULT_VOICES:
-        for v in DEFAULT_VOICES[language]:
-            result.append(VoiceInfo(name=v["name"], file=v["id"]))
-    else:
-        # Return all voices
-        for lang_voices in DEFAULT_VOICES.values():
-            for v in lang_voices:
-                result.append(VoiceInfo(name=v["name"], file=v["id"]))
-
-    return result
+    content = _VOICES_JSON.get(language, _ALL_VOICES_JSON)
+    return Response(content=content, media_type="application/json")
 
 
-@app.post("/synthesize")
-async def synthesize(request: SynthesizeRequest):
+async def require_api_key():
     if not ELEVENLABS_API_KEY:
         raise HTTPException(status_code=503, detail="ElevenLabs API key not configured")
 
-    if not request.text.strip():
+
+def _prepare(request: SynthesizeRequest, output_format: str) -> tuple[bytes, str, bytes]:
+    """Validate a synthesis request and build (cache_key, voice_id, upstream JSON body)."""
+    if not request.text or request.text.isspace():
         raise HTTPException(status_code=400, detail="Text cannot be empty")
 
     # Select model
     model_id = MODEL_TURBO_V2_5 if request.model == "turbo" else MODEL_MULTILINGUAL_V3
 
     # Select voice (default to Rachel for English, Giovanni for Italian)
-    voice_id = request.voice
-    if not voice_id:
-        if request.language == "it":
-            voice_id = "zcAOhNBS3c14rBihAFp1"  # Giovanni
-        else:
-            voice_id = "21m00Tcm4TlvDq8ikWAM"  # Rachel
-
-    # Prepare ElevenLabs API request
-    url = f"{ELEVENLABS_BASE_URL}/text-to-speech/{voice_id}"
-    headers = {
-        "xi-api-key": ELEVENLABS_API_KEY,
-        "Content-Type": "application/json",
-    }
-    payload = {
-        "text": request.text,
-        "model_id": model_id,
-        "voice_settings": {
-            "stability": request.stability,
-            "similarity_boost": request.similarity_boost,
-        },
-    }
+    voice_id = request.voice or DEFAULT_VOICE_BY_LANGUAGE.get(request.language, DEFAULT_VOICE_ID)
+
+    try:
+        body = orjson.dumps({
+            "text": request.text,
+            "model_id": model_id,
+            "voice_settings": {
+                "stability": request.stability,
+                "similarity_boost": request.similarity_boost,
+            },
+        })
+    except orjson.JSONEncodeError:
+        # e.g. a lone surrogate ("\ud800"): valid for Pydantic, not encodable as UTF-8
+        raise HTTPException(status_code=400, detail="Text must be valid Unicode")
+    cache_key = _cache_key(
+        output_format, model_id, voice_id, request.stability, request.similarity_boost, request.text
+    )
+    return cache_key, voice_id, body
+
+
+def _validation_error(error_type: str, loc: tuple, msg: str, value, **ctx) -> dict:
+    """One error entry shaped like Pydantic's, so 422 bodies match the declarative endpoints."""
+    error = {"type": error_type, "loc": ("body", *loc), "msg": msg, "input": value}
+    if ctx:
+        error["ctx"] = ctx
+    return error
+
+
+def _is_json_content_type(content_type: str | None) -> bool:
+    """Same rule FastAPI applies before decoding a body as JSON (strict: header required)."""
+    if not content_type:
+        return False
+    message = email.message.Message()
+    message["content-type"] = content_type
+    subtype = message.get_content_subtype()
+    return message.get_content_maintype() == "application" and (subtype == "json" or subtype.endswith("+json"))
+
+
+def _fast_validate(data) -> SynthesizeRequest | None:
+    """Build the model without Pydantic when data is plainly valid, else return None.
+
+    Accepts only inputs Pydantic would accept unchanged; anything else (lax coercions
+    such as bools or numeric strings, and every error) is left to model_validate().
+    """
+    if not isinstance(data, dict) or not isinstance(data.get("text"), str):
+        return None
+    fields = {"text": data["text"]}
+
+    for name in ("language", "model", "voice"):
+        if name in data:
+            value = data[name]
+            if not (isinstance(value, str) or (name == "voice" and value is None)):
+                return None
+            fields[name] = value
+
+    for name in ("stability", "similarity_boost"):
+        if name in data:
+            value = data[name]
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or not 0.0 <= value <= 1.0:
+                return None
+            fields[name] = float(value)
+
+    return SynthesizeRequest.model_construct(**fields)
+
+
+async def _parse_synthesize_request(raw: Request) -> SynthesizeRequest:
+    """Hand-rolled body handling for the hot /synthesize path.
+
+    Follows FastAPI's rules (JSON only for a JSON Content-Type, same decode errors) and
+    validates plainly valid bodies without Pydantic; everything else goes through
+    SynthesizeRequest.model_validate() so accepted inputs and 422 bodies match the
+    declarative endpoints.
+    """
+    body = await raw.body()
+    if not body:
+        raise RequestValidationError([_validation_error("missing", (), "Field required", None)])
+
+    if _is_json_content_type(raw.headers.get("content-type")):
+        try:
+            data = orjson.loads(body)
+        except orjson.JSONDecodeError:
+            # orjson is stricter than the json module FastAPI uses (NaN, lone surrogates,
+            # UTF-16 bodies), so let json decide and report the error
+            try:
+                data = json.loads(body)
+            except json.JSONDecodeError as e:
+                raise RequestValidationError(
+                    [_validation_error("json_invalid", (e.pos,), "JSON decode error", {}, error=e.msg)]
+                )
+            except Exception:
+                raise HTTPException(status_code=400, detail="There was an error parsing the body")
+    else:
+        # Non-JSON bodies are validated as raw bytes, like FastAPI does (always a 422)
+        data = body
+
+    request = _fast_validate(data)
+    if request is not None:
+        return request
+    try:
+        # from_attributes=True: FastAPI validates bodies in this mode, which shapes its error types
+        return SynthesizeRequest.model_validate(data, from_attributes=True)
+    except ValidationError as e:
+        raise RequestValidationError(
+            [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)]
+        )
+
+
+# Body is parsed by hand, so document it explicitly in the OpenAPI schema
+_SYNTHESIZE_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {"application/json": {"schema": SynthesizeRequest.model_json_schema()}},
+    },
+}
+
+
+@app.post("/synthesize", dependencies=[Depends(require_api_key)], openapi_extra=_SYNTHESIZE_OPENAPI)
+async def synthesize(raw: Request):
+    request = await _parse_synthesize_request(raw)
+    cache_key, voice_id, body = _prepare(request, "mp3")
+
+    cached, needs_refresh = _cache_get(cache_key)
+    if cached is not None:
+        if needs_refresh:
+            _refresh_audio(cache_key, voice_id, body)
+        return Response(content=cached, media_type="audio/mpeg")
 
     try:
-        response = await http_client.post(url, headers=headers, json=payload)
-        response.raise_for_status()
+        chunks = await _shared_audio_fetch(cache_key, voice_id, body)
 
-        # Return audio directly
-        return Response(content=response.content, media_type="audio/mpeg")
+        # Relay audio as it arrives instead of buffering the whole file first
+        return StreamingResponse(chunks, media_type="audio/mpeg")
 
     except httpx.HTTPStatusError as e:
         logger.exception(f"ElevenLabs API error: {e.response.status_code}")
-        error_detail = e.response.text
-        raise HTTPException(status_code=e.response.status_code, detail=f"ElevenLabs API error: {error_detail}")
+        raise
     except Exception as e:
         logger.exception("Synthesis error")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-def _make_wav_chunk(pcm_data: bytes, sample_rate: int = 24000, channels: int = 1, bits: int = 16) -> bytes:
-    """Wrappa raw PCM data in un container WAV (44-byte header + data)."""
+# Byte di PCM per frame inviato al client. Default 0.2s di audio: 4800 campioni × 2 byte
+# = 9600 byte. Più grande = meno frame/syscall, più piccolo = latenza di playback minore.
+# Allineato a 2 byte per non spezzare i campioni 16-bit.
+PCM_CHUNK_BYTES = max(2, int(os.getenv("PROXY_STREAM_CHUNK_SIZE", "9600")) & ~1)
+
+
+_pack_frame_header = struct.Struct('<I4sI4s4sIHHIIHH4sI').pack
+
+
+def _make_frame_header(pcm_len: int, sample_rate: int = 24000, channels: int = 1, bits: int = 16) -> bytes:
+    """Length-prefix di framing (4 byte) + header WAV (44 byte) per pcm_len byte di PCM."""
     byte_rate = sample_rate * channels * bits // 8
     block_align = channels * bits // 8
-    header = struct.pack(
-        '<4sI4s4sIHHIIHH4sI',
-        b'RIFF', 36 + len(pcm_data), b'WAVE',
+    return _pack_frame_header(
+        44 + pcm_len,
+        b'RIFF', 36 + pcm_len, b'WAVE',
         b'fmt ', 16, 1, channels, sample_rate, byte_rate, block_align, bits,
-        b'data', len(pcm_data),
+        b'data', pcm_len,
     )
+
+
+# Header per lunghezza PCM: tutti i frame tranne l'ultimo hanno dimensione fissa,
+# quindi in pratica le chiavi distinte sono poche (al massimo PCM_CHUNK_BYTES / 2)
+_FRAME_HEADERS: dict[int, bytes] = {PCM_CHUNK_BYTES: _make_frame_header(PCM_CHUNK_BYTES)}
+_END_OF_STREAM = struct.pack('<I', 0)
+
+
+def _make_wav_frame(pcm_data: bytes) -> bytes:
+    """Wrappa raw PCM in un frame [len][WAV header][data] con una sola copia dei dati."""
+    n = len(pcm_data)
+    header = _FRAME_HEADERS.get(n)
+    if header is None:
+        header = _FRAME_HEADERS[n] = _make_frame_header(n)
     return header + pcm_data
 
 
-@app.post("/synthesize/stream")
+@app.post("/synthesize/stream", dependencies=[Depends(require_api_key)])
 async def synthesize_stream(request: SynthesizeRequest):
     """Streaming TTS via ElevenLabs streaming endpoint.
 
@@ -238,64 +710,60 @@ async def synthesize_stream(request: SynthesizeRequest):
     ogni chunk in un header WAV — così il frontend può decodificare ogni chunk
     individualmente con audioContext.decodeAudioData() come gli altri backend.
     """
-    if not ELEVENLABS_API_KEY:
-        raise HTTPException(status_code=503, detail="ElevenLabs API key not configured")
-
-    if not request.text.strip():
-        raise HTTPException(status_code=400, detail="Text cannot be empty")
-
-    model_id = MODEL_TURBO_V2_5 if request.model == "turbo" else MODEL_MULTILINGUAL_V3
-
-    voice_id = request.voice
-    if not voice_id:
-        if request.language == "it":
-            voice_id = "zcAOhNBS3c14rBihAFp1"
-        else:
-            voice_id = "21m00Tcm4TlvDq8ikWAM"
-
     # output_format=pcm_24000: raw PCM 16-bit mono 24kHz, chunk-decodabile come WAV
-    url = f"{ELEVENLABS_BASE_URL}/text-to-speech/{voice_id}/stream?output_format=pcm_24000"
-    headers = {
-        "xi-api-key": ELEVENLABS_API_KEY,
-        "Content-Type": "application/json",
-    }
-    payload = {
-        "text": request.text,
-        "model_id": model_id,
-        "voice_settings": {
-            "stability": request.stability,
-            "similarity_boost": request.similarity_boost,
-        },
-    }
-
-    # 0.2s di audio per chunk: 4800 campioni × 2 byte = 9600 byte
-    PCM_CHUNK_BYTES = 9600
+    cache_key, voice_id, body = _prepare(request, "pcm_24000")
+
+    # Le entry PCM scadono al TTL e vengono riscaricate al miss successivo (nessun refresh in background)
+    cached, _ = _cache_get(cache_key)
 
     async def audio_generator():
+        if cached is not None:
+            # Cache hit: replay il PCM salvato con lo stesso framing dello stream
+            for start in range(0, len(cached), PCM_CHUNK_BYTES):
+                yield _make_wav_frame(cached[start:start + PCM_CHUNK_BYTES])
+            yield _END_OF_STREAM
+            return
+
         try:
-            async with http_client.stream("POST", url, headers=headers, json=payload) as response:
+            async with http_client.stream(
+                "POST",
+                _TTS_PATH + voice_id + _STREAM_SUFFIX,
+                params=_STREAM_PARAMS,
+                headers=_JSON_HEADERS,
+                content=body,
+            ) as response:
                 response.raise_for_status()
-
-                pcm_buf = b""
-                async for chunk in response.aiter_bytes(chunk_size=4096):
+                logger.debug(f"ElevenLabs stream over {response.http_version}")
+
+                pcm_buf = bytearray()
+                # Copia per la cache solo finché il PCM può ancora entrarci
+                pcm_all: bytearray | None = bytearray() if AUDIO_CACHE_MAX_BYTES > 0 else None
+                # Nessun chunk_size: inoltra i blocchi così come arrivano dal socket
+                # (già decodificati), il re-chunking a PCM_CHUNK_BYTES avviene qui sotto
+                async for chunk in response.aiter_bytes():
                     if chunk:
                         pcm_buf += chunk
+                        if pcm_all is not None:
+                            pcm_all += chunk
+                            if len(pcm_all) > AUDIO_CACHE_MAX_BYTES:
+                                pcm_all = None
                         # Emetti chunk WAV ogni volta che abbiamo abbastanza PCM
                         while len(pcm_buf) >= PCM_CHUNK_BYTES:
-                            pcm_data = pcm_buf[:PCM_CHUNK_BYTES]
-                            pcm_buf = pcm_buf[PCM_CHUNK_BYTES:]
-                            wav = _make_wav_chunk(pcm_data)
-                            yield struct.pack('<I', len(wav)) + wav
+                            yield _make_wav_frame(pcm_buf[:PCM_CHUNK_BYTES])
+                            del pcm_buf[:PCM_CHUNK_BYTES]
 
                 # Flush PCM rimanente (allinea a 2 byte per campione 16-bit)
                 if len(pcm_buf) > 1:
                     if len(pcm_buf) % 2:
                         pcm_buf = pcm_buf[:-1]
-                    wav = _make_wav_chunk(pcm_buf)
-                    yield struct.pack('<I', len(wav)) + wav
+                    yield _make_wav_frame(pcm_buf)
+
+            # Stream completo: salva in cache il PCM allineato a 2 byte
+            if pcm_all is not None:
+                _cache_put(cache_key, bytes(pcm_all[:len(pcm_all) & ~1]))
 
             # End-of-stream signal
-            yield struct.pack('<I', 0)
+            yield _END_OF_STREAM
 
         except httpx.HTTPStatusError as e:
             logger.exception(f"ElevenLabs streaming error: {e.response.status_code}")
@@ -311,4 +779,16 @@ async def synthesize_stream(request: SynthesizeRequest):
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run(app, host="0.0.0.0", port=8005)
+    # uvloop + httptools (from uvicorn[standard]) instead of asyncio + h11.
+    # In production prefer multiple processes, e.g.:
+    #   gunicorn -k uvicorn.workers.UvicornWorker -w N server:app
+    uvicorn.run(
+        "server:app",
+        host="0.0.0.0",
+        port=8005,
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+        log_level="info",
+        access_log=False,
+    )
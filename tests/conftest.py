@@ -0,0 +1,49 @@
+import inspect
+import os
+
+import httpx
+import pytest
+
+# server reads the API key at import time
+os.environ.setdefault("ELEVENLABS_API_KEY", "test-key")
+
+import server  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Route the shared http_client to a mock ElevenLabs; set `upstream.handler` per test."""
+
+    class Upstream:
+        def __init__(self):
+            self.requests: list[httpx.Request] = []
+
+        def handler(self, request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, content=b"\x00\x01" * 1000)
+
+    mock = Upstream()
+
+    async def dispatch(request: httpx.Request) -> httpx.Response:
+        mock.requests.append(request)
+        response = mock.handler(request)
+        if inspect.isawaitable(response):
+            response = await response
+        return response
+
+    monkeypatch.setattr(
+        server,
+        "http_client",
+        httpx.AsyncClient(transport=httpx.MockTransport(dispatch), base_url=server.ELEVENLABS_BASE_URL),
+    )
+    monkeypatch.setattr(server, "_audio_cache", server.OrderedDict())
+    monkeypatch.setattr(server, "_audio_cache_bytes", 0)
+    monkeypatch.setattr(server, "_inflight", {})
+    monkeypatch.setattr(server, "_refresh_retry_at", {})
+    return mock
+
+
+@pytest.fixture
+def client(upstream):
+    # No lifespan: it would replace http_client and warm up against the real API
+    return TestClient(server.app)
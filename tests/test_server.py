@@ -0,0 +1,202 @@
+import asyncio
+
+import httpx
+import pytest
+
+import server
+
+
+async def _fail_after(data: bytes):
+    yield data
+    raise httpx.ReadError("connection reset")
+
+
+def test_synthesize_relays_upstream_audio(client, upstream):
+    response = client.post("/synthesize", json={"text": "Ciao"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "audio/mpeg"
+    assert response.content == b"\x00\x01" * 1000
+    assert len(upstream.requests) == 1
+
+
+def test_synthesize_aborts_on_upstream_error_midway(client, upstream):
+    upstream.handler = lambda request: httpx.Response(200, content=_fail_after(b"x" * 500))
+
+    with pytest.raises(httpx.ReadError):
+        client.post("/synthesize", json={"text": "Ciao"})
+    assert not server._audio_cache
+
+
+def _read_frames(body: bytes) -> list[bytes]:
+    """Split a /synthesize/stream body into WAV frames, checking the end-of-stream marker."""
+    frames = []
+    while True:
+        size = int.from_bytes(body[:4], "little")
+        body = body[4:]
+        if size == 0:
+            assert body == b""
+            return frames
+        frames.append(body[:size])
+        body = body[size:]
+
+
+def test_synthesize_stream_frames_pcm_and_caches_it(client, upstream):
+    first = client.post("/synthesize/stream", json={"text": "Ciao"})
+    second = client.post("/synthesize/stream", json={"text": "Ciao"})
+
+    frames = _read_frames(first.content)
+    assert [frame[:4] for frame in frames] == [b"RIFF"]
+    assert frames[0][44:] == b"\x00\x01" * 1000
+    assert second.content == first.content
+    assert len(upstream.requests) == 1
+
+
+@pytest.mark.parametrize("budget", [0, 1000])
+def test_synthesize_stream_skips_cache_when_disabled_or_over_budget(client, upstream, monkeypatch, budget):
+    monkeypatch.setattr(server, "AUDIO_CACHE_MAX_BYTES", budget)
+
+    first = client.post("/synthesize/stream", json={"text": "Ciao"})
+    second = client.post("/synthesize/stream", json={"text": "Ciao"})
+
+    assert second.content == first.content
+    assert len(upstream.requests) == 2
+    assert not server._audio_cache
+
+
+@pytest.mark.parametrize("path", ["/synthesize", "/synthesize/stream"])
+def test_synthesize_rejects_lone_surrogates(client, upstream, path):
+    response = client.post(path, content=b'{"text": "\\ud800"}', headers={"content-type": "application/json"})
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Text must be valid Unicode"}
+    assert not upstream.requests
+
+
+def test_validation_error_decodes_raw_body_input(client):
+    response = client.post("/synthesize/stream", content=b'{"text":"a"}', headers={"content-type": "text/plain"})
+
+    assert response.status_code == 422
+    assert response.json() == {
+        "detail": [{
+            "type": "model_attributes_type",
+            "loc": ["body"],
+            "msg": "Input should be a valid dictionary or object to extract fields from",
+            "input": '{"text":"a"}',
+        }]
+    }
+
+
+JSON = {"content-type": "application/json"}
+
+# (body, headers) pairs: /synthesize parses these by hand, /synthesize/stream through FastAPI
+INVALID_BODIES = [
+    (b"", JSON),
+    (b"{}", JSON),
+    (b"[]", JSON),
+    (b'"text"', JSON),
+    (b"{not json", JSON),
+    (b'{"text": 1, "voice": 2, "language": null}', JSON),
+    (b'{"text": "a", "stability": 2, "similarity_boost": -0.5}', JSON),
+    (b'{"text": "a", "stability": "high"}', JSON),
+    (b'{"text": "a", "stability": NaN}', JSON),
+    (b'{"text": "a"}', {"content-type": "text/plain"}),
+    (b'{"text": "a"}', {}),
+    (b"\xff\xfe{", JSON),
+]
+
+
+@pytest.mark.parametrize("body, headers", INVALID_BODIES)
+def test_synthesize_validation_matches_stream_endpoint(client, upstream, body, headers):
+    parsed = client.post("/synthesize", content=body, headers=headers)
+    declarative = client.post("/synthesize/stream", content=body, headers=headers)
+
+    assert parsed.status_code == declarative.status_code
+    assert parsed.status_code in (400, 422)
+    assert parsed.json() == declarative.json()
+    assert not upstream.requests
+
+
+@pytest.mark.parametrize("body", [
+    {"text": "a"},
+    {"text": "a", "voice": None, "language": "it", "model": "multilingual"},
+    {"text": "a", "stability": 0, "similarity_boost": 1},
+    {"text": "a", "stability": True},
+    {"text": "a", "stability": "0.25"},
+    {"text": "a", "extra": "ignored"},
+])
+def test_synthesize_accepts_what_the_model_accepts(client, upstream, body):
+    response = client.post("/synthesize", json=body)
+
+    assert response.status_code == 200
+    expected = server.SynthesizeRequest.model_validate(body)
+    sent = upstream.requests[0].content
+    assert server.orjson.loads(sent)["voice_settings"] == {
+        "stability": expected.stability,
+        "similarity_boost": expected.similarity_boost,
+    }
+
+
+def test_cache_eviction_forgets_refresh_backoff(upstream, monkeypatch):
+    monkeypatch.setattr(server, "AUDIO_CACHE_MAX_BYTES", 10)
+    server._cache_put(b"old", b"x" * 6)
+    server._refresh_retry_at[b"old"] = float("inf")
+
+    server._cache_put(b"new", b"y" * 6)
+
+    assert list(server._audio_cache) == [b"new"]
+    assert b"old" not in server._refresh_retry_at
+
+
+def test_uncacheable_download_stops_when_last_listener_leaves(upstream, monkeypatch):
+    monkeypatch.setattr(server, "AUDIO_CACHE_MAX_BYTES", 0)
+    sent = []
+
+    async def endless():
+        while True:
+            sent.append(b"x")
+            yield b"x" * 100
+            await asyncio.sleep(0)
+
+    upstream.handler = lambda request: httpx.Response(200, content=endless())
+
+    async def scenario():
+        chunks = await server._shared_audio_fetch(b"key", "voice", b"{}")
+        fetch = server._inflight[b"key"]
+        assert await chunks.__anext__() == b"x" * 100
+        await chunks.aclose()
+
+        assert b"key" not in server._inflight
+        with pytest.raises(asyncio.CancelledError):
+            await asyncio.wait_for(fetch.task, timeout=1)
+        produced = len(sent)
+        await asyncio.sleep(0.01)
+        assert len(sent) == produced
+        assert fetch.done and fetch.ready.done()
+
+    asyncio.run(scenario())
+
+
+def test_uncacheable_download_stops_when_leader_leaves_before_upstream_answers(upstream, monkeypatch):
+    monkeypatch.setattr(server, "AUDIO_CACHE_MAX_BYTES", 0)
+
+    async def scenario():
+        answered = asyncio.Event()
+
+        async def slow(request):
+            await answered.wait()
+            return httpx.Response(200, content=b"late")
+
+        upstream.handler = slow
+        waiter = asyncio.create_task(server._shared_audio_fetch(b"key", "voice", b"{}"))
+        await asyncio.sleep(0)
+        fetch = server._inflight[b"key"]
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        with pytest.raises(asyncio.CancelledError):
+            await asyncio.wait_for(fetch.task, timeout=1)
+        assert b"key" not in server._inflight
+        assert fetch.ready.cancelled()
+
+    asyncio.run(scenario())